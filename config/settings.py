@@ -34,7 +34,6 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    'django.middleware.cache.UpdateCacheMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -42,7 +41,6 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'django.middleware.cache.FetchFromCacheMiddleware',
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -73,6 +71,9 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
+        # Постоянные соединения вместо нового подключения на каждый запрос
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE') or 60),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -151,9 +152,35 @@ CACHES = {
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'sessions'
 
+# Кешем всего сайта не пользуемся: представления кешируют себя сами (CacheMixin, cache_page),
+# а ключи списков версионированы и сбрасываются сигналами. Значения ниже - умолчания для cache_page
 CACHE_MIDDLEWARE_ALIAS = 'default'
 CACHE_MIDDLEWARE_SECONDS = 600  # 10 минут
 CACHE_MIDDLEWARE_KEY_PREFIX = ''
 
 # Site URL
-SITE_URL = os.getenv('SITE_URL')
\ No newline at end of file
+SITE_URL = os.getenv('SITE_URL') or 'http://localhost:8000'  # Для ссылок в письмах из фоновых задач
+
+# Заголовок с IP клиента, который выставляет обратный прокси (например, HTTP_X_REAL_IP).
+# Пусто — запросы приходят напрямую и IP берётся из REMOTE_ADDR. Без прокси заголовок задавать нельзя:
+# клиент подделает его и обойдёт ограничения по IP
+CLIENT_IP_HEADER = os.getenv('CLIENT_IP_HEADER') or None
+
+# Celery
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL') or 'redis://localhost:6379/0'
+CELERY_TASK_ROUTES = {
+    'mailings.tasks.*': {'queue': 'mailings'},
+}
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'send-scheduled-mailings': {
+        'task': 'mailings.tasks.send_scheduled_mailings',
+        'schedule': 60.0,  # Каждую минуту
+    },
+}
+
+# Рассылки
+MAILING_ATTEMPT_BATCH_SIZE = 500  # Размер пачки при сохранении попыток рассылки
+MAILING_ASYNC_SMTP = True if os.getenv('MAILING_ASYNC_SMTP') == 'True' else False  # Отправка через aiosmtplib
+MAILING_SMTP_CONCURRENCY = 5  # Число параллельных SMTP-соединений при асинхронной отправке
+MAILING_SMTP_RETRIES = 2  # Повторы отправки письма после разрыва SMTP-соединения (не больше 5)
@@ -1,6 +1,8 @@
 from django import forms
-from django.utils import timezone
+from django.core.cache import cache
+from django.utils.functional import cached_property
 from .models import Mailing, Message, Recipient
+from .utils import get_list_version
 
 
 class MailingForm(forms.ModelForm):
@@ -12,19 +14,35 @@ class MailingForm(forms.ModelForm):
             'end_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
         }
 
-    def clean(self):
-        cleaned_data = super().clean()
-        start_time = cleaned_data.get('start_time')
-        end_time = cleaned_data.get('end_time')
-
-        if start_time and end_time:
-            if start_time >= end_time:
-                raise forms.ValidationError('Дата начала должна быть раньше даты окончания')
-
-            if start_time < timezone.now():
-                raise forms.ValidationError('Дата начала не может быть в прошлом')
-
-        return cleaned_data
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        # Выбирать можно только свои сообщения и получателей
+        if user is not None:
+            self.fields['message'].queryset = Message.objects.filter(owner=user)
+            self.fields['recipients'].queryset = Recipient.objects.filter(owner=user)
+
+    @cached_property
+    def message_options(self):
+        """Варианты для выбора сообщения: (id, тема)"""
+        queryset = self.fields['message'].queryset
+        return self._get_options('message', lambda: list(queryset.values_list('id', 'subject')))
+
+    @cached_property
+    def recipient_options(self):
+        """Варианты для выбора получателей: (id, "Ф.И.О. (email)")"""
+        queryset = self.fields['recipients'].queryset
+        return self._get_options('recipient', lambda: [
+            (pk, f'{full_name} ({email})')
+            for pk, full_name, email in queryset.values_list('id', 'full_name', 'email')
+        ])
+
+    def _get_options(self, kind, build):
+        """Варианты выбора из кеша; ключ меняется вместе с версией списков пользователя"""
+        if self.user is None:
+            return build()
+        cache_key = f'{kind}_options:{get_list_version(kind, self.user.id)}:{self.user.id}'
+        return cache.get_or_set(cache_key, build, 300)
 
 
 class MessageForm(forms.ModelForm):
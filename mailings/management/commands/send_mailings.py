@@ -1,15 +1,21 @@
+from celery import group
 from django.core.management.base import BaseCommand
-from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import Count
 from django.utils import timezone
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from mailings.models import Mailing, MailingAttempt
+from mailings.models import Mailing
+from mailings.tasks import send_mailing_task, send_mailings_chunk_task
+from mailings.utils import chunked
 from datetime import datetime, timedelta
 import logging
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
+User = get_user_model()
+
 
 class Command(BaseCommand):
     help = 'Отправка запланированных рассылок'
@@ -28,13 +34,30 @@ class Command(BaseCommand):
         parser.add_argument(
             '--force',
             action='store_true',
-            help='Принудительная отправка даже если рассылка не в статусе "Запущена"'
+            help='Принудительная отправка даже если рассылка не в статусе "Запущена" или уже отправлялась'
         )
         parser.add_argument(
             '--dry-run',
             action='store_true',
             help='Пробный запуск без реальной отправки'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'MAILING_ATTEMPT_BATCH_SIZE', 500),
+            help='Количество попыток рассылки, сохраняемых в базу одним запросом'
+        )
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help='Отправка в текущем процессе без постановки задач в очередь Celery (для отладки)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100,
+            help='Количество рассылок в одной задаче Celery'
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('=' * 60))
@@ -46,54 +69,79 @@ class Command(BaseCommand):
         user_email = options.get('user_email')
         force = options.get('force', False)
         dry_run = options.get('dry_run', False)
+        self.batch_size = options.get('batch_size')
+        self.sync = options.get('sync', False)
+        chunk_size = options.get('chunk_size')
+
+        # Время фиксируется один раз на весь запуск
+        now = timezone.now()
 
         # Формируем queryset рассылок
-        mailings = self.get_mailings_queryset(mailing_id, user_email, force)
+        mailings = self.get_mailings_queryset(mailing_id, user_email, force, now)
+        mailings = self.claim_mailings(mailings, force, dry_run)
+
+        # Один запрос вместо exists() + count() + выборки
+        mailing_list = list(mailings)
+        total = len(mailing_list)
 
-        if not mailings.exists():
+        if not total:
             self.stdout.write(self.style.WARNING('Нет рассылок для отправки'))
             return
 
-        self.stdout.write(self.style.SUCCESS(f'Найдено рассылок для отправки: {mailings.count()}'))
+        self.stdout.write(self.style.SUCCESS(f'Найдено рассылок для отправки: {total}'))
 
         # Отправляем рассылки
         results = {
             'total': 0,
             'success': 0,
             'failed': 0,
-            'skipped': 0
+            'skipped': 0,
+            'queued': 0
         }
+        queued_ids = []
 
-        for mailing in mailings:
-            result = self.process_mailing(mailing, force, dry_run)
+        for mailing in mailing_list:
+            result = self.process_mailing(mailing, now, force, dry_run)
             results['total'] += 1
             results['success'] += 1 if result['success'] else 0
             results['failed'] += 1 if result['failed'] else 0
             results['skipped'] += 1 if result['skipped'] else 0
+            if result.get('queued'):
+                results['queued'] += 1
+                queued_ids.append(mailing.id)
+
+        # Ставим рассылки в очередь пачками: одна задача на chunk_size рассылок
+        signatures = [
+            send_mailings_chunk_task.s(chunk, self.batch_size)
+            for chunk in chunked(queued_ids, chunk_size)
+        ]
+        if signatures:
+            group(signatures).apply_async()
 
         # Выводим итоги
         self.print_summary(results, dry_run)
 
-    def get_mailings_queryset(self, mailing_id=None, user_email=None, force=False):
+    def get_mailings_queryset(self, mailing_id=None, user_email=None, force=False, now=None):
         """Получение queryset рассылок для отправки"""
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-
         # Базовый queryset
         if mailing_id:
             # Конкретная рассылка по ID
-            mailings = Mailing.objects.filter(id=mailing_id)
+            mailings = Mailing.objects.select_related('message', 'owner').filter(
+                id=mailing_id
+            )
             self.stdout.write(self.style.SUCCESS(f'Режим: отправка конкретной рассылки ID={mailing_id}'))
         else:
             # Все активные рассылки
-            now = timezone.now()
+            now = now or timezone.now()
             if force:
                 # Принудительно все активные
-                mailings = Mailing.objects.filter(is_active=True)
+                mailings = Mailing.objects.select_related('message', 'owner').filter(
+                    is_active=True
+                )
                 self.stdout.write(self.style.WARNING('Режим: принудительная отправка всех активных рассылок'))
             else:
                 # Только те, которые должны быть запущены сейчас
-                mailings = Mailing.objects.filter(
+                mailings = Mailing.objects.select_related('message', 'owner').filter(
                     start_time__lte=now,
                     end_time__gte=now,
                     is_active=True
@@ -110,9 +158,31 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.ERROR(f'Пользователь с email {user_email} не найден'))
                 return Mailing.objects.none()
 
-        return mailings
+        # Для проверки «есть ли получатели» достаточно числа: строки Recipient (с полем comment) не загружаем.
+        # Порядок для отправки не важен: сбрасываем сортировку по умолчанию (-created_at)
+        return mailings.annotate(recipients_count=Count('recipients')).order_by()
+
+    def claim_mailings(self, mailings, force=False, dry_run=False):
+        """Отбор рассылок, которые ещё не отправлялись, с переводом их в статус «Запущена».
+
+        Работает так же, как send_scheduled_mailings: рассылку, уже забранную Celery beat
+        или параллельным запуском команды, повторно не отправляем. С --force статус не проверяется.
+        """
+        pending = mailings if force else mailings.filter(status='created')
+        if dry_run:
+            return pending
+
+        with transaction.atomic():
+            # skip_locked: рассылки, которые сейчас забирает другой процесс, пропускаем
+            mailing_ids = list(Mailing.objects.select_for_update(skip_locked=True).filter(
+                pk__in=pending.values('pk')
+            ).values_list('id', flat=True))
+            Mailing.objects.filter(pk__in=mailing_ids).update(status='started')
+
+        # Статус уже сменился, поэтому дальше выбираем рассылки по id
+        return mailings.filter(pk__in=mailing_ids)
 
-    def process_mailing(self, mailing, force=False, dry_run=False):
+    def process_mailing(self, mailing, now, force=False, dry_run=False):
         """Обработка одной рассылки"""
         self.stdout.write(self.style.SUCCESS('-' * 40))
         self.stdout.write(f'Рассылка #{mailing.id}: {mailing.message.subject}')
@@ -121,7 +191,7 @@ class Command(BaseCommand):
             f'  Период: {mailing.start_time.strftime("%d.%m.%Y %H:%M")} - {mailing.end_time.strftime("%d.%m.%Y %H:%M")}')
 
         # Проверка статуса
-        dynamic_status = mailing.get_dynamic_status()
+        dynamic_status = mailing.get_dynamic_status(now=now)
         self.stdout.write(f'  Статус: {dynamic_status}')
 
         if not force and dynamic_status != 'started':
@@ -129,10 +199,11 @@ class Command(BaseCommand):
                 self.style.WARNING(f'  Пропущена: рассылка не в статусе "Запущена" (текущий: {dynamic_status})'))
             return {'success': False, 'failed': False, 'skipped': True}
 
-        recipients = mailing.recipients.all()
-        self.stdout.write(f'  Получателей: {recipients.count()}')
+        # Число получателей посчитано в выборке (annotate), отдельных запросов нет
+        recipients_count = mailing.recipients_count
+        self.stdout.write(f'  Получателей: {recipients_count}')
 
-        if not recipients.exists():
+        if not recipients_count:
             self.stdout.write(self.style.WARNING('  Пропущена: нет получателей'))
             return {'success': False, 'failed': False, 'skipped': True}
 
@@ -140,21 +211,15 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('  ПРОБНЫЙ ЗАПУСК: отправка не производится'))
             return {'success': True, 'failed': False, 'skipped': False}
 
-        # Отправка рассылки
-        success_count = 0
-        failed_count = 0
+        if not self.sync:
+            # Отправка выполняется воркером Celery, задачи ставятся пачками в handle
+            self.stdout.write(self.style.SUCCESS('  Рассылка поставлена в очередь на отправку'))
+            return {'success': False, 'failed': False, 'skipped': False, 'queued': True}
 
-        for recipient in recipients:
-            try:
-                if self.send_email(mailing, recipient):
-                    success_count += 1
-                    self.create_attempt(mailing, recipient, 'success', 'Письмо успешно отправлено')
-                else:
-                    failed_count += 1
-            except Exception as e:
-                failed_count += 1
-                self.create_attempt(mailing, recipient, 'failed', str(e))
-                self.stdout.write(self.style.ERROR(f'    Ошибка для {recipient.email}: {str(e)}'))
+        # Синхронная отправка (для отладки)
+        result = send_mailing_task.run(mailing.id, self.batch_size) or {'success_count': 0, 'failed_count': 0}
+        success_count = result['success_count']
+        failed_count = result['failed_count']
 
         self.stdout.write(self.style.SUCCESS(f'  Результат: успешно {success_count}, ошибок {failed_count}'))
 
@@ -166,26 +231,6 @@ class Command(BaseCommand):
             'failed_count': failed_count
         }
 
-    def send_email(self, mailing, recipient):
-        """Отправка одного письма"""
-        send_mail(
-            subject=mailing.message.subject,
-            message=mailing.message.body,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[recipient.email],
-            fail_silently=False,
-        )
-        return True
-
-    def create_attempt(self, mailing, recipient, status, response):
-        """Создание записи о попытке отправки"""
-        MailingAttempt.objects.create(
-            status=status,
-            server_response=response,
-            mailing=mailing,
-            recipient=recipient
-        )
-
     def print_summary(self, results, dry_run=False):
         """Вывод итоговой статистики"""
         self.stdout.write(self.style.SUCCESS('=' * 60))
@@ -193,6 +238,8 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS('=' * 60))
         self.stdout.write(f'Всего обработано рассылок: {results["total"]}')
         self.stdout.write(f'Успешно отправлено: {results["success"]}')
+        if results['queued']:
+            self.stdout.write(f'Поставлено в очередь: {results["queued"]}')
         self.stdout.write(f'С ошибками: {results["failed"]}')
         self.stdout.write(f'Пропущено: {results["skipped"]}')
 
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-14 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0002_alter_mailing_options_alter_message_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="mailing",
+            index=models.Index(fields=["is_active", "start_time", "end_time"], name="mailing_sched_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="mailing",
+            index=models.Index(fields=["owner", "is_active"], name="mailing_owner_idx"),
+        ),
+    ]
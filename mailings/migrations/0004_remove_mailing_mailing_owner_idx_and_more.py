@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-14 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0003_mailing_mailing_sched_idx_mailing_mailing_owner_idx"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="mailing",
+            name="mailing_owner_idx",
+        ),
+        migrations.AddIndex(
+            model_name="mailing",
+            index=models.Index(
+                fields=["owner", "is_active", "start_time", "end_time"], name="mailing_owner_sched_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mailingattempt",
+            index=models.Index(fields=["mailing", "status"], name="attempt_mailing_status_idx"),
+        ),
+    ]
@@ -1,14 +1,21 @@
 from django.views.decorators.cache import cache_page
-from django.utils.decorators import method_decorator
 from django.conf import settings
 
 
 class CacheMixin:
     """Mixin для кеширования представлений"""
+    cache_timeout = 300  # 5 минут
 
-    @method_decorator(cache_page(settings.CACHE_MIDDLEWARE_SECONDS))
-    def dispatch(self, *args, **kwargs):
-        return super().dispatch(*args, **kwargs)
+    def get_cache_key(self):
+        """Префикс ключа кеша; при смене версии старые страницы становятся недоступны"""
+        return None
+
+    def get_cache_timeout(self):
+        return self.cache_timeout
+
+    def dispatch(self, request, *args, **kwargs):
+        cached_dispatch = cache_page(self.get_cache_timeout(), key_prefix=self.get_cache_key())(super().dispatch)
+        return cached_dispatch(request, *args, **kwargs)
 
 
 class CacheForAnonymousMixin:
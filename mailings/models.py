@@ -2,9 +2,8 @@ from django.db import models
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
 
 User = get_user_model()
 
@@ -30,11 +29,6 @@ class Recipient(models.Model):
     def __str__(self):
         return f"{self.full_name} ({self.email})"
 
-    def save(self, *args, **kwargs):
-        # Очищаем кеш при сохранении
-        cache.delete_pattern('recipient_list_*')
-        super().save(*args, **kwargs)
-
 
 class Message(models.Model):
     """Модель сообщения для рассылки"""
@@ -56,11 +50,6 @@ class Message(models.Model):
     def __str__(self):
         return self.subject
 
-    def save(self, *args, **kwargs):
-        # Очищаем кеш при сохранении
-        cache.delete_pattern('message_list_*')
-        super().save(*args, **kwargs)
-
 
 class Mailing(models.Model):
     """Модель рассылки"""
@@ -93,6 +82,13 @@ class Mailing(models.Model):
             ('can_view_all_mailings', 'Может просматривать все рассылки'),
             ('can_disable_mailing', 'Может отключать рассылки'),
         ]
+        indexes = [
+            # Выборка рассылок по расписанию: сначала равенство, затем диапазоны
+            models.Index(fields=['is_active', 'start_time', 'end_time'], name='mailing_sched_idx'),
+            # Списки и статистика владельца; префикс (owner, is_active) покрывает подсчёт активных
+            models.Index(fields=['owner', 'is_active', 'start_time', 'end_time'],
+                         name='mailing_owner_sched_idx'),
+        ]
 
     def __str__(self):
         return f"Рассылка #{self.id} - {self.message.subject}"
@@ -107,35 +103,46 @@ class Mailing(models.Model):
                 raise ValidationError('Дата начала не может быть в прошлом')
 
     def save(self, *args, **kwargs):
-        # Валидация
-        self.full_clean()
+        # Валидация (можно пропустить, если меняется только статус/активность)
+        if not kwargs.pop('skip_validation', False):
+            self.full_clean()
+        super().save(*args, **kwargs)
 
-        # Очищаем кеш при сохранении
-        cache.delete(f'mailing_status_{self.id}')
-        cache.delete_pattern('mailing_list_*')
+    def get_dynamic_status(self, now=None):
+        """Вычисление статуса рассылки на основе текущего времени с кешированием.
 
-        super().save(*args, **kwargs)
+        Если передан now, статус вычисляется без обращения к кешу.
+        """
+        if now is not None:
+            return self._compute_status(now)
 
-    def get_dynamic_status(self):
-        """Вычисление статуса рассылки на основе текущего времени с кешированием"""
         cache_key = f'mailing_status_{self.id}'
         status = cache.get(cache_key)
 
         if not status:
-            now = timezone.now()
-
-            if now < self.start_time:
-                status = 'created'
-            elif self.start_time <= now <= self.end_time and self.is_active:
-                status = 'started'
-            else:
-                status = 'completed'
+            status = self._compute_status(timezone.now())
 
             # Кешируем на 60 секунд
             cache.set(cache_key, status, 60)
 
         return status
 
+    @cached_property
+    def dynamic_status(self):
+        """Динамический статус, вычисленный один раз для экземпляра"""
+        return self.get_dynamic_status()
+
+    def get_dynamic_status_display(self):
+        """Отображаемое название динамического статуса"""
+        return dict(self.STATUS_CHOICES).get(self.dynamic_status, self.dynamic_status)
+
+    def _compute_status(self, now):
+        if now < self.start_time:
+            return 'created'
+        if self.start_time <= now <= self.end_time and self.is_active:
+            return 'started'
+        return 'completed'
+
     def get_status_display(self):
         """Возвращает отображаемое название статуса"""
         status_dict = dict(self.STATUS_CHOICES)
@@ -162,44 +169,10 @@ class MailingAttempt(models.Model):
         verbose_name = 'Попытка рассылки'
         verbose_name_plural = 'Попытки рассылок'
         ordering = ['-attempt_time']
+        indexes = [
+            # Подсчёт попыток по статусу в рамках рассылки
+            models.Index(fields=['mailing', 'status'], name='attempt_mailing_status_idx'),
+        ]
 
     def __str__(self):
         return f"Попытка #{self.id} - {self.attempt_time.strftime('%d.%m.%Y %H:%M')}"
-
-    def save(self, *args, **kwargs):
-        # Очищаем кеш попыток при сохранении
-        cache.delete(f'mailing_attempts_{self.mailing_id}')
-        super().save(*args, **kwargs)
-
-
-@receiver(post_save, sender=Mailing)
-@receiver(post_delete, sender=Mailing)
-def clear_mailing_cache(sender, instance, **kwargs):
-    """Очистка кеша при изменениях в рассылках"""
-    cache.delete_pattern('*mailing_list*')
-    cache.delete(f'mailing_status_{instance.id}')
-    if instance.owner:
-        cache.delete_pattern(f'*user_{instance.owner.id}_mailings*')
-
-
-@receiver(post_save, sender=Message)
-@receiver(post_delete, sender=Message)
-def clear_message_cache(sender, **kwargs):
-    """Очистка кеша при изменениях в сообщениях"""
-    cache.delete_pattern('message_list_*')
-
-
-@receiver(post_save, sender=Recipient)
-@receiver(post_delete, sender=Recipient)
-def clear_recipient_cache(sender, instance, **kwargs):
-    """Очистка кеша при изменениях в получателях"""
-    cache.delete_pattern('*recipient_list*')
-    if instance.owner:
-        cache.delete_pattern(f'*user_{instance.owner.id}_recipients*')
-
-
-@receiver(post_save, sender=MailingAttempt)
-@receiver(post_delete, sender=MailingAttempt)
-def clear_attempt_cache(sender, instance, **kwargs):
-    """Очистка кеша при изменениях в попытках"""
-    cache.delete(f'mailing_attempts_{instance.mailing_id}')
\ No newline at end of file
@@ -0,0 +1,267 @@
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends import smtp
+from django.core.mail.utils import DNS_NAME
+from django.core.cache import cache
+from django.conf import settings
+from .models import MailingAttempt
+import aiosmtplib
+from email.generator import BytesGenerator
+from email.utils import make_msgid, parseaddr
+from io import BytesIO
+from functools import partial
+import asyncio
+import logging
+import smtplib
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def send_email(subject, body, from_email, email, connection):
+    """Отправка одного письма через открытое соединение"""
+    EmailMessage(
+        subject=subject,
+        body=body,
+        from_email=from_email,
+        to=[email],
+        connection=connection,
+    ).send()
+
+
+# Заглушки, которые подставляются в заранее собранное письмо
+RECIPIENT_PLACEHOLDER = 'recipient@placeholder.invalid'
+MESSAGE_ID_PLACEHOLDER = '<message-id@placeholder.invalid>'
+
+
+def build_raw_message(subject, body, from_email):
+    """Сборка письма в байты один раз на рассылку, с заглушками адресата и Message-ID"""
+    message = EmailMessage(
+        subject=subject,
+        body=body,
+        from_email=from_email,
+        to=[RECIPIENT_PLACEHOLDER],
+        headers={'Message-ID': MESSAGE_ID_PLACEHOLDER},
+    ).message()
+    buffer = BytesIO()
+    BytesGenerator(buffer, policy=message.policy.clone(linesep='\r\n')).flatten(message)
+    return buffer.getvalue()
+
+
+def send_raw(raw_message, envelope_from, email, connection):
+    """Отправка заранее собранного письма: подставляются только адресат и Message-ID"""
+    message = raw_message.replace(RECIPIENT_PLACEHOLDER.encode(), email.encode()).replace(
+        MESSAGE_ID_PLACEHOLDER.encode(), make_msgid(domain=DNS_NAME).encode()
+    )
+    connection.connection.sendmail(envelope_from, [email], message)
+
+
+# Верхняя граница повторов: задержки выполняются прямо в воркере Celery
+MAX_SMTP_RETRIES = 5
+
+
+def get_smtp_retries():
+    """Число повторов после разрыва SMTP-соединения с учётом верхней границы"""
+    return max(0, min(getattr(settings, 'MAILING_SMTP_RETRIES', 2), MAX_SMTP_RETRIES))
+
+
+class SMTPConnectionFailed(Exception):
+    """Не удалось подключиться к SMTP-серверу или авторизоваться"""
+
+
+def send_with_reconnect(send, connection):
+    """Отправка письма с переподключением, если сервер разорвал соединение.
+
+    Если переподключиться не удалось, выбрасывает SMTPConnectionFailed.
+    """
+    retries = get_smtp_retries()
+    for attempt in range(retries + 1):
+        try:
+            send()
+            return
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError):
+            if attempt == retries:
+                raise
+            # Экспоненциальная задержка: 1, 2, 4... секунды
+            time.sleep(2 ** attempt)
+            connection.close()
+            try:
+                connection.open()
+            except Exception as e:
+                raise SMTPConnectionFailed(str(e)) from e
+
+
+def send_all(subject, body, from_email, rows):
+    """Последовательная отправка через одно SMTP-соединение.
+
+    Выдаёт кортежи (recipient_id, email, error), где error равен None при успехе.
+    """
+    # Итератор нужен, чтобы при потере соединения дописать ошибку оставшимся строкам
+    rows = iter(rows)
+    connection = get_connection(fail_silently=False)
+    # Готовые байты можно передать только SMTP-серверу; остальные бэкенды (locmem, console, file)
+    # принимают объекты EmailMessage
+    use_raw = isinstance(connection, smtp.EmailBackend)
+    if use_raw:
+        raw_message = build_raw_message(subject, body, from_email)
+        envelope_from = parseaddr(from_email)[1]
+    try:
+        try:
+            connection.open()
+        except Exception as e:
+            # Сервер недоступен: фиксируем ошибку для каждого получателя, чтобы рассылка не пропала бесследно
+            for recipient_id, email in rows:
+                yield recipient_id, email, str(e)
+            return
+        for recipient_id, email in rows:
+            if use_raw and email.isascii():
+                send = partial(send_raw, raw_message, envelope_from, email, connection)
+            else:
+                # Не SMTP-бэкенд или адрес требует кодирования заголовков: собираем письмо целиком
+                send = partial(send_email, subject, body, from_email, email, connection)
+            try:
+                send_with_reconnect(send, connection)
+            except SMTPConnectionFailed as e:
+                # Соединение потеряно: остальным получателям записываем ту же ошибку
+                yield recipient_id, email, str(e)
+                for recipient_id, email in rows:
+                    yield recipient_id, email, str(e)
+                return
+            except smtplib.SMTPRecipientsRefused as e:
+                # Жёсткий отказ: адрес отклонён сервером, повтор не поможет, переходим к следующему
+                logger.warning('Адрес %s отклонён сервером: %s', email, e.recipients)
+                yield recipient_id, email, f'Адрес отклонён сервером: {e.recipients}'
+            except Exception as e:
+                yield recipient_id, email, str(e)
+            else:
+                yield recipient_id, email, None
+    finally:
+        connection.close()
+
+
+async def connect_async():
+    """Открытие и авторизация асинхронного SMTP-соединения"""
+    smtp = aiosmtplib.SMTP(
+        hostname=settings.EMAIL_HOST,
+        port=int(settings.EMAIL_PORT),
+        use_tls=settings.EMAIL_USE_SSL,
+        start_tls=settings.EMAIL_USE_TLS,
+    )
+    try:
+        await smtp.connect()
+        if settings.EMAIL_HOST_USER:
+            await smtp.login(settings.EMAIL_HOST_USER, settings.EMAIL_HOST_PASSWORD)
+    except Exception as e:
+        smtp.close()
+        raise SMTPConnectionFailed(str(e)) from e
+    return smtp
+
+
+async def send_all_async(subject, body, from_email, rows, concurrency):
+    """Параллельная отправка через несколько SMTP-соединений (aiosmtplib).
+
+    Ожидание ответов сервера перекрывается, поэтому время отправки близко к
+    суммарному времени, делённому на число соединений. Результат для каждой строки
+    записывается, даже если часть соединений не удалось открыть.
+    """
+    queue = asyncio.Queue()
+    for row in rows:
+        queue.put_nowait(row)
+    results = []
+    connection_errors = []
+    retries = get_smtp_retries()
+
+    async def send_one(smtp, message):
+        """Отправка с переподключением; возвращает соединение, через которое ушло письмо"""
+        for attempt in range(retries + 1):
+            try:
+                if smtp is None:
+                    smtp = await connect_async()
+                await smtp.send_message(message)
+                return smtp
+            except (SMTPConnectionFailed, aiosmtplib.SMTPServerDisconnected):
+                if smtp is not None:
+                    smtp.close()
+                    smtp = None
+                if attempt == retries:
+                    raise
+                # Экспоненциальная задержка: 1, 2, 4... секунды
+                await asyncio.sleep(2 ** attempt)
+
+    async def worker():
+        smtp = None
+        try:
+            while not queue.empty():
+                recipient_id, email = queue.get_nowait()
+                try:
+                    message = EmailMessage(subject=subject, body=body, from_email=from_email, to=[email]).message()
+                    smtp = await send_one(smtp, message)
+                except (SMTPConnectionFailed, aiosmtplib.SMTPServerDisconnected) as e:
+                    # Соединение восстановить не удалось: остальные письма отправят другие воркеры
+                    smtp = None
+                    results.append((recipient_id, email, str(e)))
+                    connection_errors.append(str(e))
+                    return
+                except Exception as e:
+                    results.append((recipient_id, email, str(e)))
+                else:
+                    results.append((recipient_id, email, None))
+        finally:
+            if smtp is not None:
+                try:
+                    await smtp.quit()
+                except Exception:
+                    smtp.close()
+
+    workers = max(1, min(concurrency, queue.qsize()))
+    for error in await asyncio.gather(*(worker() for _ in range(workers)), return_exceptions=True):
+        if isinstance(error, Exception):
+            logger.error('Ошибка воркера асинхронной отправки: %s', error)
+            connection_errors.append(str(error))
+
+    # Строки, которые не успел взять ни один воркер (все соединения недоступны)
+    while not queue.empty():
+        recipient_id, email = queue.get_nowait()
+        results.append((recipient_id, email, connection_errors[-1] if connection_errors else 'SMTP недоступен'))
+
+    return results
+
+
+def send_mailing(mailing, batch_size=None):
+    """Отправка рассылки всем получателям с сохранением попыток"""
+    if batch_size is None:
+        batch_size = getattr(settings, 'MAILING_ATTEMPT_BATCH_SIZE', 500)
+
+    successes = []
+    failures = []
+
+    # Общие для всех писем данные читаем один раз, а не на каждого получателя
+    subject = mailing.message.subject
+    body = mailing.message.body
+    from_email = settings.DEFAULT_FROM_EMAIL
+
+    # Из получателей нужны только id и email
+    rows = mailing.recipients.values_list('id', 'email').order_by()
+
+    if getattr(settings, 'MAILING_ASYNC_SMTP', False):
+        concurrency = getattr(settings, 'MAILING_SMTP_CONCURRENCY', 5)
+        results = asyncio.run(send_all_async(subject, body, from_email, list(rows), concurrency))
+    else:
+        results = send_all(subject, body, from_email, rows.iterator())
+
+    for recipient_id, email, error in results:
+        if error is None:
+            successes.append(MailingAttempt(status='success', server_response='Письмо успешно отправлено',
+                                            mailing=mailing, recipient_id=recipient_id))
+        else:
+            failures.append(MailingAttempt(status='failed', server_response=error,
+                                           mailing=mailing, recipient_id=recipient_id))
+            logger.error('Рассылка #%s: ошибка для %s: %s', mailing.id, email, error)
+
+    # Сохраняем попытки пачками и один раз сбрасываем кеш
+    MailingAttempt.objects.bulk_create(successes + failures, batch_size=batch_size)
+    cache.delete(f'mailing_attempts_{mailing.id}')
+
+    return {
+        'success_count': len(successes),
+        'failed_count': len(failures),
+    }
@@ -1,7 +1,9 @@
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from .models import Mailing
+from .models import Mailing, Message, Recipient, MailingAttempt
+from .utils import bump_list_version
 
 
 @receiver(pre_save, sender=Mailing)
@@ -9,4 +11,35 @@ def validate_mailing_dates(sender, instance, **kwargs):
     """Валидация дат перед сохранением"""
     if instance.start_time and instance.end_time:
         if instance.start_time >= instance.end_time:
-            raise ValidationError('Дата начала должна быть раньше даты окончания')
\ No newline at end of file
+            raise ValidationError('Дата начала должна быть раньше даты окончания')
+
+
+@receiver(post_save, sender=Mailing)
+@receiver(post_delete, sender=Mailing)
+def clear_mailing_cache(sender, instance, **kwargs):
+    """Очистка кеша при изменениях в рассылках"""
+    cache.delete(f'mailing_status_{instance.id}')
+    bump_list_version('mailing', instance.owner_id)
+
+
+@receiver(post_save, sender=Message)
+@receiver(post_delete, sender=Message)
+def clear_message_cache(sender, instance, **kwargs):
+    """Очистка кеша при изменениях в сообщениях"""
+    bump_list_version('message', instance.owner_id)
+    # В списке рассылок выводится тема сообщения
+    bump_list_version('mailing', instance.owner_id)
+
+
+@receiver(post_save, sender=Recipient)
+@receiver(post_delete, sender=Recipient)
+def clear_recipient_cache(sender, instance, **kwargs):
+    """Очистка кеша при изменениях в получателях"""
+    bump_list_version('recipient', instance.owner_id)
+
+
+@receiver(post_save, sender=MailingAttempt)
+@receiver(post_delete, sender=MailingAttempt)
+def clear_attempt_cache(sender, instance, **kwargs):
+    """Очистка кеша при изменениях в попытках"""
+    cache.delete(f'mailing_attempts_{instance.mailing_id}')
\ No newline at end of file
@@ -0,0 +1,62 @@
+from celery import group, shared_task
+from django.db import transaction
+from django.utils import timezone
+from .models import Mailing
+from .services import send_mailing
+from .utils import chunked
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def send_mailing_task(mailing_id, batch_size=None):
+    """Фоновая отправка рассылки"""
+    try:
+        mailing = Mailing.objects.select_related('message').get(pk=mailing_id)
+    except Mailing.DoesNotExist:
+        logger.warning('Рассылка #%s не найдена', mailing_id)
+        return None
+
+    return send_mailing(mailing, batch_size=batch_size)
+
+
+@shared_task
+def send_mailings_chunk_task(mailing_ids, batch_size=None):
+    """Фоновая отправка пачки рассылок одной задачей"""
+    mailings = Mailing.objects.select_related('message').filter(pk__in=mailing_ids)
+    results = {}
+    for mailing in mailings:
+        # Ошибка одной рассылки не должна прерывать отправку остальных в пачке
+        try:
+            results[mailing.id] = send_mailing(mailing, batch_size=batch_size)
+        except Exception as e:
+            logger.exception('Ошибка отправки рассылки #%s', mailing.id)
+            results[mailing.id] = {'error': str(e)}
+    return results
+
+
+@shared_task
+def send_scheduled_mailings(chunk_size=100):
+    """Постановка в очередь рассылок, которые должны выполняться сейчас (запускается Celery beat).
+
+    Каждая рассылка отправляется по расписанию один раз: при постановке в очередь
+    её статус меняется с «Создана» на «Запущена», и следующие запуски её пропускают.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # skip_locked: параллельный запуск не заберёт те же рассылки повторно
+        mailing_ids = list(Mailing.objects.select_for_update(skip_locked=True).filter(
+            start_time__lte=now,
+            end_time__gte=now,
+            is_active=True,
+            status='created',
+        ).order_by().values_list('id', flat=True))
+        Mailing.objects.filter(pk__in=mailing_ids).update(status='started')
+
+    # Пачки рассылок расходятся по свободным воркерам очереди mailings параллельно.
+    # Дробить до отдельного получателя не стоит: внутри пачки рассылка шлётся
+    # через одно SMTP-соединение.
+    signatures = [send_mailings_chunk_task.s(chunk) for chunk in chunked(mailing_ids, chunk_size)]
+    if signatures:
+        group(signatures).apply_async()
@@ -1,3 +1,367 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+import smtplib
 
-# Create your tests here.
+import aiosmtplib
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.mail.backends import smtp
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from users.models import User
+from .models import Mailing, Message, Recipient
+from .services import MAX_SMTP_RETRIES, send_mailing
+from .tasks import send_mailings_chunk_task, send_scheduled_mailings
+from .utils import get_list_version
+
+
+class MailingTestMixin:
+    """Общие данные для тестов рассылок"""
+
+    def create_mailing(self, recipients=2, **kwargs):
+        now = timezone.now()
+        owner = User.objects.create_user(email=f'owner{Mailing.objects.count()}@example.com', password='pass')
+        message = Message.objects.create(subject='Тема', body='Текст письма', owner=owner)
+        mailing = Mailing(
+            start_time=kwargs.pop('start_time', now - timedelta(hours=1)),
+            end_time=kwargs.pop('end_time', now + timedelta(hours=1)),
+            message=message,
+            owner=owner,
+            **kwargs,
+        )
+        # Период уже начался: валидацию «начало не в прошлом» пропускаем
+        mailing.save(skip_validation=True)
+        mailing.recipients.set([
+            Recipient.objects.create(email=f'r{mailing.id}-{i}@example.com', full_name=f'Получатель {i}', owner=owner)
+            for i in range(recipients)
+        ])
+        return mailing
+
+
+class SendScheduledMailingsTest(MailingTestMixin, TestCase):
+    """Отправка по расписанию (Celery beat)"""
+
+    @mock.patch('mailings.tasks.group')
+    def test_mailing_is_queued_once(self, group):
+        mailing = self.create_mailing()
+
+        send_scheduled_mailings()
+        send_scheduled_mailings()
+
+        self.assertEqual(group.call_count, 1)
+        mailing.refresh_from_db()
+        self.assertEqual(mailing.status, 'started')
+
+    @mock.patch('mailings.tasks.group')
+    def test_inactive_and_finished_mailings_are_skipped(self, group):
+        now = timezone.now()
+        self.create_mailing(is_active=False)
+        self.create_mailing(start_time=now - timedelta(days=2), end_time=now - timedelta(days=1))
+
+        send_scheduled_mailings()
+
+        group.assert_not_called()
+
+
+class SendMailingsChunkTaskTest(MailingTestMixin, TestCase):
+    """Отправка пачки рассылок одной задачей"""
+
+    @override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_error_in_one_mailing_does_not_stop_chunk(self):
+        failing = self.create_mailing()
+        mailing = self.create_mailing()
+        original = send_mailing
+
+        def send(item, **kwargs):
+            if item.id == failing.id:
+                raise RuntimeError('сбой')
+            return original(item, **kwargs)
+
+        with mock.patch('mailings.tasks.send_mailing', side_effect=send), self.assertLogs('mailings.tasks', 'ERROR'):
+            results = send_mailings_chunk_task([failing.id, mailing.id])
+
+        self.assertEqual(results[failing.id], {'error': 'сбой'})
+        self.assertEqual(results[mailing.id], {'success_count': 2, 'failed_count': 0})
+
+
+class SendMailingsCommandTest(MailingTestMixin, TestCase):
+    """Команда send_mailings"""
+
+    @mock.patch('mailings.management.commands.send_mailings.group')
+    def test_queued_mailings_are_not_counted_as_sent(self, group):
+        self.create_mailing()
+        out = StringIO()
+
+        call_command('send_mailings', stdout=out)
+
+        group.assert_called_once()
+        self.assertIn('Успешно отправлено: 0', out.getvalue())
+        self.assertIn('Поставлено в очередь: 1', out.getvalue())
+
+    @mock.patch('mailings.tasks.group')
+    @mock.patch('mailings.management.commands.send_mailings.group')
+    def test_mailing_is_not_sent_twice(self, group, beat_group):
+        mailing = self.create_mailing()
+
+        send_scheduled_mailings()
+        call_command('send_mailings', stdout=StringIO())
+
+        beat_group.assert_called_once()
+        group.assert_not_called()
+        mailing.refresh_from_db()
+        self.assertEqual(mailing.status, 'started')
+
+    @mock.patch('mailings.management.commands.send_mailings.group')
+    def test_recipients_are_counted_without_loading_rows(self, group):
+        self.create_mailing(recipients=0)
+        self.create_mailing(recipients=2)
+        out = StringIO()
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command('send_mailings', stdout=out)
+
+        self.assertIn('Пропущено: 1', out.getvalue())
+        self.assertIn('Поставлено в очередь: 1', out.getvalue())
+        recipient_table = Recipient._meta.db_table
+        self.assertFalse([q['sql'] for q in queries if f'{recipient_table}"."comment' in q['sql']])
+
+    @mock.patch('mailings.management.commands.send_mailings.group')
+    def test_force_sends_started_mailing(self, group):
+        self.create_mailing(status='started')
+
+        call_command('send_mailings', '--force', stdout=StringIO())
+
+        group.assert_called_once()
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class SendMailingTest(MailingTestMixin, TestCase):
+    """Отправка рассылки и сохранение попыток"""
+
+    def test_send_with_locmem_backend(self):
+        mailing = self.create_mailing(recipients=2)
+
+        result = send_mailing(mailing)
+
+        self.assertEqual(result, {'success_count': 2, 'failed_count': 0})
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            sorted(mailing.recipients.values_list('email', flat=True)),
+        )
+        self.assertEqual(mailing.attempts.filter(status='success').count(), 2)
+
+    def test_raw_message_is_sent_over_smtp_connection(self):
+        mailing = self.create_mailing(recipients=2)
+        backend = smtp.EmailBackend()
+        backend.connection = mock.Mock()
+
+        with mock.patch('mailings.services.get_connection', return_value=backend), \
+                mock.patch.object(backend, 'open'), mock.patch.object(backend, 'close'):
+            result = send_mailing(mailing)
+
+        self.assertEqual(result, {'success_count': 2, 'failed_count': 0})
+        sent = {call.args[1][0]: call.args[2] for call in backend.connection.sendmail.call_args_list}
+        self.assertEqual(set(sent), set(mailing.recipients.values_list('email', flat=True)))
+        message_ids = set()
+        for email, raw in sent.items():
+            self.assertIn(f'To: {email}'.encode(), raw)
+            self.assertNotIn(b'placeholder.invalid', raw)
+            self.assertIn(b'\r\n', raw)
+            message_ids.add(next(line for line in raw.split(b'\r\n') if line.startswith(b'Message-ID:')))
+        # Message-ID у каждого письма свой
+        self.assertEqual(len(message_ids), 2)
+
+    def smtp_backend(self):
+        backend = smtp.EmailBackend()
+        backend.connection = mock.Mock()
+        return backend
+
+    @mock.patch('mailings.services.time.sleep')
+    def test_reconnect_with_backoff_after_disconnect(self, sleep):
+        mailing = self.create_mailing(recipients=1)
+        backend = self.smtp_backend()
+        backend.connection.sendmail.side_effect = [
+            smtplib.SMTPServerDisconnected('обрыв'), smtplib.SMTPServerDisconnected('обрыв'), {},
+        ]
+
+        with mock.patch('mailings.services.get_connection', return_value=backend), \
+                mock.patch.object(backend, 'open') as open_, mock.patch.object(backend, 'close'), \
+                self.settings(MAILING_SMTP_RETRIES=2):
+            result = send_mailing(mailing)
+
+        self.assertEqual(result, {'success_count': 1, 'failed_count': 0})
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [1, 2])
+        # Первое подключение и два переподключения
+        self.assertEqual(open_.call_count, 3)
+
+    def test_unreachable_server_is_recorded_for_every_recipient(self):
+        mailing = self.create_mailing(recipients=2)
+        backend = smtp.EmailBackend()
+
+        with mock.patch('mailings.services.get_connection', return_value=backend), \
+                mock.patch.object(backend, 'open', side_effect=ConnectionRefusedError('Connection refused')):
+            result = send_mailing(mailing)
+
+        self.assertEqual(result, {'success_count': 0, 'failed_count': 2})
+        self.assertEqual(
+            list(mailing.attempts.values_list('server_response', flat=True)), ['Connection refused'] * 2
+        )
+
+    @mock.patch('mailings.services.time.sleep')
+    def test_failed_reconnect_is_recorded_for_remaining_recipients(self, sleep):
+        mailing = self.create_mailing(recipients=3)
+        backend = self.smtp_backend()
+        backend.connection.sendmail.side_effect = smtplib.SMTPServerDisconnected('обрыв')
+
+        with mock.patch('mailings.services.get_connection', return_value=backend), \
+                mock.patch.object(backend, 'open', side_effect=[None, ConnectionRefusedError('Connection refused')]), \
+                mock.patch.object(backend, 'close'):
+            result = send_mailing(mailing)
+
+        self.assertEqual(result, {'success_count': 0, 'failed_count': 3})
+        self.assertEqual(
+            list(mailing.attempts.values_list('server_response', flat=True)), ['Connection refused'] * 3
+        )
+        self.assertEqual(backend.connection.sendmail.call_count, 1)
+
+    @mock.patch('mailings.services.time.sleep')
+    def test_retries_are_capped(self, sleep):
+        mailing = self.create_mailing(recipients=1)
+        backend = self.smtp_backend()
+        backend.connection.sendmail.side_effect = smtplib.SMTPServerDisconnected('обрыв')
+
+        with mock.patch('mailings.services.get_connection', return_value=backend), \
+                mock.patch.object(backend, 'open'), mock.patch.object(backend, 'close'), \
+                self.settings(MAILING_SMTP_RETRIES=100):
+            send_mailing(mailing)
+
+        self.assertEqual(sleep.call_count, MAX_SMTP_RETRIES)
+
+    @mock.patch('mailings.services.time.sleep')
+    def test_refused_recipient_is_not_retried(self, sleep):
+        mailing = self.create_mailing(recipients=1)
+        email = mailing.recipients.get().email
+        backend = self.smtp_backend()
+        backend.connection.sendmail.side_effect = smtplib.SMTPRecipientsRefused({email: (550, b'no such user')})
+
+        with mock.patch('mailings.services.get_connection', return_value=backend), \
+                mock.patch.object(backend, 'open'), mock.patch.object(backend, 'close'):
+            result = send_mailing(mailing)
+
+        self.assertEqual(result, {'success_count': 0, 'failed_count': 1})
+        self.assertEqual(backend.connection.sendmail.call_count, 1)
+        sleep.assert_not_called()
+        self.assertIn('Адрес отклонён сервером', mailing.attempts.get().server_response)
+
+
+class ListCacheTest(TestCase):
+    """Версионированный кеш списков"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='owner@example.com', password='pass', is_verified=True)
+        self.client.force_login(self.user)
+
+    def test_new_message_appears_in_cached_list(self):
+        url = reverse('mailings:message_list')
+        Message.objects.create(subject='Первое', body='Текст', owner=self.user)
+        self.assertContains(self.client.get(url), 'Первое')
+
+        Message.objects.create(subject='Второе', body='Текст', owner=self.user)
+
+        self.assertContains(self.client.get(url), 'Второе')
+
+    def test_version_is_bumped_for_owner(self):
+        version = get_list_version('recipient', self.user.id)
+
+        Recipient.objects.create(email='r@example.com', full_name='Получатель', owner=self.user)
+
+        self.assertGreater(get_list_version('recipient', self.user.id), version)
+
+    def test_unchanged_list_is_served_from_cache(self):
+        url = reverse('mailings:message_list')
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+
+        # Запросы пользователя и его прав остаются, сам список берётся из кеша
+        self.assertFalse([q for q in queries if Message._meta.db_table in q['sql']])
+
+
+class FakeAsyncSMTP:
+    """Асинхронный SMTP-клиент для тестов: сервер может отказать в подключении или разорвать сессию"""
+
+    def __init__(self, fail_connect=False, disconnect_after=None):
+        self.fail_connect = fail_connect
+        self.disconnect_after = disconnect_after
+        self.sent = []
+
+    async def connect(self):
+        if self.fail_connect:
+            raise aiosmtplib.SMTPConnectError('Connection refused')
+
+    async def login(self, *args):
+        pass
+
+    async def send_message(self, message):
+        if self.disconnect_after is not None and len(self.sent) >= self.disconnect_after:
+            raise aiosmtplib.SMTPServerDisconnected('Connection lost')
+        self.sent.append(message['To'])
+
+    async def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@override_settings(MAILING_ASYNC_SMTP=True, MAILING_SMTP_CONCURRENCY=3, MAILING_SMTP_RETRIES=1,
+                   EMAIL_HOST='smtp.example.com', EMAIL_PORT=25, EMAIL_HOST_USER='')
+@mock.patch('mailings.services.asyncio.sleep', new=mock.AsyncMock())
+class SendMailingAsyncTest(MailingTestMixin, TestCase):
+    """Асинхронная отправка через несколько соединений"""
+
+    def test_failed_connection_does_not_lose_sent_attempts(self):
+        mailing = self.create_mailing(recipients=9)
+        # Один воркер подключается, два других получают отказ и при повторе
+        clients = [FakeAsyncSMTP()] + [FakeAsyncSMTP(fail_connect=True) for _ in range(4)]
+
+        with mock.patch('mailings.services.aiosmtplib.SMTP', side_effect=clients):
+            result = send_mailing(mailing)
+
+        self.assertEqual(result['success_count'], 9 - result['failed_count'])
+        self.assertEqual(result['success_count'], len(clients[0].sent))
+        self.assertGreater(result['success_count'], 0)
+        self.assertEqual(result['success_count'] + result['failed_count'], 9)
+        self.assertEqual(mailing.attempts.count(), 9)
+
+    def test_reconnect_after_disconnect(self):
+        mailing = self.create_mailing(recipients=3)
+        clients = [FakeAsyncSMTP(disconnect_after=1), FakeAsyncSMTP()]
+
+        with override_settings(MAILING_SMTP_CONCURRENCY=1), \
+                mock.patch('mailings.services.aiosmtplib.SMTP', side_effect=clients):
+            result = send_mailing(mailing)
+
+        self.assertEqual(result, {'success_count': 3, 'failed_count': 0})
+        self.assertEqual(len(clients[0].sent) + len(clients[1].sent), 3)
+
+    def test_all_connections_failed(self):
+        mailing = self.create_mailing(recipients=4)
+
+        def refused(**kwargs):
+            return FakeAsyncSMTP(fail_connect=True)
+
+        with mock.patch('mailings.services.aiosmtplib.SMTP', side_effect=refused):
+            result = send_mailing(mailing)
+
+        self.assertEqual(result, {'success_count': 0, 'failed_count': 4})
+        self.assertEqual(set(mailing.attempts.values_list('status', flat=True)), {'failed'})
@@ -0,0 +1,50 @@
+from itertools import islice
+
+from django.core.cache import cache
+
+
+def chunked(iterable, size):
+    """Разбивает последовательность на списки длиной не более size"""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def list_version_key(kind, user_id=None):
+    """Ключ счётчика версии: общий (mailings:version) или пользователя (mailings:version:<user_id>)"""
+    key = f'{kind}s:version'
+    if user_id is None:
+        return key
+    return f'{key}:{user_id}'
+
+
+def get_list_version(kind, user_id=None):
+    """Текущая версия кеша списков (kind: mailing, message, recipient)"""
+    return cache.get_or_set(list_version_key(kind, user_id), 1, None)
+
+
+def bump_list_version(kind, user_id=None):
+    """Инвалидация закешированных списков kind: общих и, если указан, пользователя user_id.
+
+    Каждая версия сбрасывается одной операцией INCR, без перебора ключей.
+    """
+    keys = [list_version_key(kind)]
+    if user_id is not None:
+        keys.append(list_version_key(kind, user_id))
+
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Ключа версии ещё нет в кеше
+            cache.set(key, 2, None)
+
+
+def request_has_perm(request, perm):
+    """Проверка права пользователя запроса с запоминанием результата до конца запроса"""
+    perms = getattr(request, '_checked_perms', None)
+    if perms is None:
+        perms = request._checked_perms = {}
+    if perm not in perms:
+        perms[perm] = request.user.has_perm(perm)
+    return perms[perm]
@@ -1,87 +1,66 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.mail import send_mail
-from django.conf import settings
 from django.utils import timezone
 from django.db.models import Count, Q
+from django.db.models.functions import Left
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin, UserPassesTestMixin
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, View
 from django.urls import reverse_lazy
 from django.core.cache import cache
-from django.views.decorators.cache import cache_page
-from django.utils.decorators import method_decorator
 from .models import Mailing, Message, Recipient, MailingAttempt
 from .forms import MailingForm, MessageForm, RecipientForm
+from .tasks import send_mailing_task
+from .mixins import CacheMixin
+from .utils import get_list_version, request_has_perm
 
 
-# Миксины для кеширования
-class CacheMixin:
-    """Mixin для кеширования представлений"""
-
-    @method_decorator(cache_page(300))  # 5 минут
-    def dispatch(self, *args, **kwargs):
-        return super().dispatch(*args, **kwargs)
+def _home_stats(user):
+    """Статистика для главной страницы"""
+    now = timezone.now()
+    if user.is_authenticated:
+        # Для авторизованных пользователей показываем их статистику.
+        # Общее и активное количество рассылок одним запросом
+        mailing_stats = Mailing.objects.filter(owner=user).aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(start_time__lte=now, end_time__gte=now, is_active=True)),
+        )
 
+        # Статистика по попыткам (в кеш кладём уже вычисленный список, а не QuerySet)
+        attempts_stats = list(MailingAttempt.objects.filter(
+            mailing__owner=user
+        ).values('status').annotate(count=Count('id')))
 
-class CacheForAnonymousMixin:
-    """Mixin для кеширования только для анонимных пользователей"""
+        return {
+            'total_mailings': mailing_stats['total'],
+            'active_mailings': mailing_stats['active'],
+            'total_recipients': Recipient.objects.filter(owner=user).count(),
+            'attempts_stats': attempts_stats,
+        }
 
-    def dispatch(self, request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            return cache_page(300)(super().dispatch)(request, *args, **kwargs)
-        return super().dispatch(request, *args, **kwargs)
+    # Для неавторизованных показываем общую статистику
+    mailing_stats = Mailing.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(start_time__lte=now, end_time__gte=now, is_active=True)),
+    )
+    return {
+        'total_mailings': mailing_stats['total'],
+        'active_mailings': mailing_stats['active'],
+        'total_recipients': Recipient.objects.count(),
+    }
 
 
 def home(request):
     """Главная страница со статистикой (с кешированием)"""
-    # Пытаемся получить данные из кеша
-    cache_key = f'home_stats_{request.user.id if request.user.is_authenticated else "anonymous"}'
-    context = cache.get(cache_key)
-
-    if not context:
-        if request.user.is_authenticated:
-            # Для авторизованных пользователей показываем их статистику
-            mailings = Mailing.objects.filter(owner=request.user)
-            recipients = Recipient.objects.filter(owner=request.user)
-
-            total_mailings = mailings.count()
-            active_mailings = mailings.filter(
-                start_time__lte=timezone.now(),
-                end_time__gte=timezone.now(),
-                is_active=True
-            ).count()
-            total_recipients = recipients.count()
-
-            # Статистика по попыткам
-            attempts_stats = MailingAttempt.objects.filter(
-                mailing__owner=request.user
-            ).values('status').annotate(count=Count('id'))
-
-            context = {
-                'total_mailings': total_mailings,
-                'active_mailings': active_mailings,
-                'total_recipients': total_recipients,
-                'attempts_stats': attempts_stats,
-            }
-        else:
-            # Для неавторизованных показываем общую статистику
-            total_mailings = Mailing.objects.count()
-            active_mailings = Mailing.objects.filter(
-                start_time__lte=timezone.now(),
-                end_time__gte=timezone.now(),
-                is_active=True
-            ).count()
-            total_recipients = Recipient.objects.count()
-
-            context = {
-                'total_mailings': total_mailings,
-                'active_mailings': active_mailings,
-                'total_recipients': total_recipients,
-            }
-
-        # Сохраняем в кеш на 5 минут
-        cache.set(cache_key, context, 300)
+    # Статистика анонимной страницы общая для всех посетителей, поэтому хранится под одним ключом.
+    # Страницу целиком не кешируем: в базовом шаблоне выводятся flash-сообщения.
+    if request.user.is_authenticated:
+        cache_key = f'home_stats_{request.user.id}'
+    else:
+        cache_key = 'home_anon_stats'
+
+    # Сохраняем в кеш на 5 минут
+    context = cache.get_or_set(cache_key, lambda: _home_stats(request.user), 300)
 
     return render(request, 'mailings/home.html', context)
 
@@ -99,7 +78,7 @@ class OwnerQuerysetMixin:
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        if self.request.user.has_perm('mailings.can_view_all_mailings'):
+        if request_has_perm(self.request, 'mailings.can_view_all_mailings'):
             return queryset
         return queryset.filter(owner=self.request.user)
 
@@ -109,6 +88,17 @@ class ManagerRequiredMixin(PermissionRequiredMixin):
     permission_required = 'mailings.can_view_all_mailings'
 
 
+class ObjectCacheMixin:
+    """Mixin для однократной загрузки объекта за запрос (test_func, get/post, контекст)"""
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_cached_object'):
+            self._cached_object = super().get_object()
+        return self._cached_object
+
+
 class OwnerOrManagerMixin(UserPassesTestMixin):
     """Mixin для проверки: владелец или менеджер"""
 
@@ -117,7 +107,7 @@ class OwnerOrManagerMixin(UserPassesTestMixin):
         user = self.request.user
 
         # Менеджеры могут просматривать всё
-        if user.has_perm('mailings.can_view_all_mailings'):
+        if request_has_perm(self.request, 'mailings.can_view_all_mailings'):
             return True
 
         # Обычные пользователи могут работать только со своим
@@ -132,16 +122,21 @@ class MessageListView(LoginRequiredMixin, OwnerQuerysetMixin, CacheMixin, ListVi
     paginate_by = 20
 
     def get_queryset(self):
-        if self.request.user.has_perm('mailings.can_view_all_messages'):
-            return Message.objects.all()
-        return Message.objects.filter(owner=self.request.user)
+        # Только поля, которые выводит шаблон списка (без тела письма)
+        queryset = Message.objects.only('id', 'subject', 'created_at')
+        if request_has_perm(self.request, 'mailings.can_view_all_messages'):
+            return queryset
+        return queryset.filter(owner=self.request.user)
 
     def get_cache_key(self):
         """Генерирует уникальный ключ кеша для текущего пользователя"""
-        return f'message_list_user_{self.request.user.id}'
+        user = self.request.user
+        # Тем, кто видит все записи, нужна общая версия, остальным - своя
+        owner_id = None if request_has_perm(self.request, 'mailings.can_view_all_messages') else user.id
+        return f'message_list:{get_list_version("message", owner_id)}:{user.id}'
 
 
-class MessageDetailView(LoginRequiredMixin, OwnerOrManagerMixin, DetailView):
+class MessageDetailView(LoginRequiredMixin, ObjectCacheMixin, OwnerOrManagerMixin, DetailView):
     model = Message
     template_name = 'mailings/message_detail.html'
 
@@ -156,10 +151,6 @@ class MessageCreateView(LoginRequiredMixin, OwnerMixin, CreateView):
         form.instance.owner = self.request.user
         response = super().form_valid(form)
 
-        # Очищаем кеш для списка сообщений
-        cache.delete_pattern('*message_list*')
-        cache.delete_pattern(f'*user_{self.request.user.id}_messages*')
-
         # Добавляем сообщение об успехе
         from django.contrib import messages
         messages.success(self.request, 'Сообщение успешно создано!')
@@ -167,7 +158,7 @@ class MessageCreateView(LoginRequiredMixin, OwnerMixin, CreateView):
         return response
 
 
-class MessageUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class MessageUpdateView(LoginRequiredMixin, ObjectCacheMixin, UserPassesTestMixin, UpdateView):
     model = Message
     form_class = MessageForm
     template_name = 'mailings/message_form.html'
@@ -179,14 +170,11 @@ class MessageUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
 
     def form_valid(self, form):
         response = super().form_valid(form)
-        # Очищаем кеш после обновления
-        cache.delete_pattern('*message_list*')
-        cache.delete_pattern(f'*user_{self.request.user.id}_messages*')
         messages.success(self.request, 'Сообщение успешно обновлено!')
         return response
 
 
-class MessageDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class MessageDeleteView(LoginRequiredMixin, ObjectCacheMixin, UserPassesTestMixin, DeleteView):
     model = Message
     template_name = 'mailings/message_confirm_delete.html'
     success_url = reverse_lazy('mailings:message_list')
@@ -197,8 +185,6 @@ class MessageDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
     def delete(self, request, *args, **kwargs):
         response = super().delete(request, *args, **kwargs)
-        cache.delete_pattern('*message_list*')
-        cache.delete_pattern(f'*user_{self.request.user.id}_messages*')
         messages.success(request, 'Сообщение успешно удалено!')
         return response
 
@@ -211,16 +197,20 @@ class RecipientListView(LoginRequiredMixin, OwnerQuerysetMixin, CacheMixin, List
     paginate_by = 20
 
     def get_queryset(self):
-        if self.request.user.has_perm('mailings.can_view_all_recipients'):
-            return Recipient.objects.all()
-        return Recipient.objects.filter(owner=self.request.user)
+        queryset = Recipient.objects.only('id', 'email', 'full_name', 'comment')
+        if request_has_perm(self.request, 'mailings.can_view_all_recipients'):
+            return queryset
+        return queryset.filter(owner=self.request.user)
 
     def get_cache_key(self):
         """Генерирует уникальный ключ кеша для текущего пользователя"""
-        return f'recipient_list_user_{self.request.user.id}'
+        user = self.request.user
+        # Тем, кто видит все записи, нужна общая версия, остальным - своя
+        owner_id = None if request_has_perm(self.request, 'mailings.can_view_all_recipients') else user.id
+        return f'recipient_list:{get_list_version("recipient", owner_id)}:{user.id}'
 
 
-class RecipientDetailView(LoginRequiredMixin, OwnerOrManagerMixin, DetailView):
+class RecipientDetailView(LoginRequiredMixin, ObjectCacheMixin, OwnerOrManagerMixin, DetailView):
     model = Recipient
     template_name = 'mailings/recipient_detail.html'
 
@@ -235,15 +225,12 @@ class RecipientCreateView(LoginRequiredMixin, OwnerMixin, CreateView):
         form.instance.owner = self.request.user
         response = super().form_valid(form)
 
-        cache.delete_pattern('*recipient_list*')
-        cache.delete_pattern(f'*user_{self.request.user.id}_recipients*')
-
         messages.success(self.request, 'Получатель успешно создан!')
 
         return response
 
 
-class RecipientUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class RecipientUpdateView(LoginRequiredMixin, ObjectCacheMixin, UserPassesTestMixin, UpdateView):
     model = Recipient
     form_class = RecipientForm
     template_name = 'mailings/recipient_form.html'
@@ -255,13 +242,11 @@ class RecipientUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
 
     def form_valid(self, form):
         response = super().form_valid(form)
-        cache.delete_pattern('*recipient_list*')
-        cache.delete_pattern(f'*user_{self.request.user.id}_recipients*')
         messages.success(self.request, 'Получатель успешно обновлен!')
         return response
 
 
-class RecipientDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class RecipientDeleteView(LoginRequiredMixin, ObjectCacheMixin, UserPassesTestMixin, DeleteView):
     model = Recipient
     template_name = 'mailings/recipient_confirm_delete.html'
     success_url = reverse_lazy('mailings:recipient_list')
@@ -272,8 +257,6 @@ class RecipientDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
     def delete(self, request, *args, **kwargs):
         response = super().delete(request, *args, **kwargs)
-        cache.delete_pattern('*recipient_list*')
-        cache.delete_pattern(f'*user_{self.request.user.id}_recipients*')
         messages.success(request, 'Получатель успешно удален!')
         return response
 
@@ -286,35 +269,45 @@ class MailingListView(LoginRequiredMixin, OwnerQuerysetMixin, CacheMixin, ListVi
     paginate_by = 20
 
     def get_queryset(self):
-        if self.request.user.has_perm('mailings.can_view_all_mailings'):
-            return Mailing.objects.all()
-        return Mailing.objects.filter(owner=self.request.user)
+        queryset = Mailing.objects.select_related('message').only(
+            'id', 'start_time', 'end_time', 'is_active', 'owner_id', 'message__subject'
+        )
+        if request_has_perm(self.request, 'mailings.can_view_all_mailings'):
+            return queryset
+        return queryset.filter(owner=self.request.user)
 
     def get_cache_key(self):
         """Генерирует уникальный ключ кеша для текущего пользователя"""
-        return f'mailing_list_user_{self.request.user.id}'
+        user = self.request.user
+        # Тем, кто видит все записи, нужна общая версия, остальным - своя
+        owner_id = None if request_has_perm(self.request, 'mailings.can_view_all_mailings') else user.id
+        return f'mailing_list:{get_list_version("mailing", owner_id)}:{user.id}'
 
     def get_cache_timeout(self):
         """Разное время кеширования для разных пользователей"""
-        if self.request.user.has_perm('mailings.can_view_all_mailings'):
+        if request_has_perm(self.request, 'mailings.can_view_all_mailings'):
             return 60  # 1 минута для менеджеров
         return 300  # 5 минут для обычных пользователей
 
 
-class MailingDetailView(LoginRequiredMixin, OwnerOrManagerMixin, DetailView):
+class MailingDetailView(LoginRequiredMixin, ObjectCacheMixin, OwnerOrManagerMixin, DetailView):
     model = Mailing
     template_name = 'mailings/mailing_detail.html'
 
+    def get_queryset(self):
+        # Шаблон выводит сообщение, владельца и всех получателей
+        return Mailing.objects.select_related('message', 'owner').prefetch_related('recipients')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        mailing = self.get_object()
-        context['dynamic_status'] = mailing.get_dynamic_status()
+        mailing = self.object
+        context['dynamic_status'] = mailing.dynamic_status
 
         # Кешируем попытки
         cache_key = f'mailing_attempts_{mailing.id}'
         attempts = cache.get(cache_key)
         if not attempts:
-            attempts = MailingAttempt.objects.filter(mailing=mailing)[:10]
+            attempts = MailingAttempt.objects.filter(mailing=mailing).select_related('recipient')[:10]
             cache.set(cache_key, attempts, 60)  # Кешируем на 1 минуту
 
         context['attempts'] = attempts
@@ -329,29 +322,18 @@ class MailingCreateView(LoginRequiredMixin, OwnerMixin, CreateView):
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        kwargs['initial'] = {
-            'recipients': Recipient.objects.filter(owner=self.request.user),
-            'message': Message.objects.filter(owner=self.request.user)
-        }
+        kwargs['user'] = self.request.user
         return kwargs
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['available_messages'] = Message.objects.filter(owner=self.request.user)
-        context['available_recipients'] = Recipient.objects.filter(owner=self.request.user)
-        return context
-
     def form_valid(self, form):
         form.instance.owner = self.request.user
         response = super().form_valid(form)
-        cache.delete_pattern('*mailing_list*')
-        cache.delete_pattern(f'*user_{self.request.user.id}_mailings*')
         messages.success(self.request, 'Рассылка успешно создана!')
 
         return response
 
 
-class MailingUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class MailingUpdateView(LoginRequiredMixin, ObjectCacheMixin, UserPassesTestMixin, UpdateView):
     model = Mailing
     form_class = MailingForm
     template_name = 'mailings/mailing_form.html'
@@ -361,21 +343,20 @@ class MailingUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         mailing = self.get_object()
         return self.request.user == mailing.owner
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['available_messages'] = Message.objects.filter(owner=self.request.user)
-        context['available_recipients'] = Recipient.objects.filter(owner=self.request.user)
-        return context
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
 
     def form_valid(self, form):
+        # Новый период: рассылка снова будет отправлена по расписанию
+        if {'start_time', 'end_time'} & set(form.changed_data):
+            form.instance.status = 'created'
         response = super().form_valid(form)
-        cache.delete_pattern('*mailing_list*')
-        cache.delete_pattern(f'*user_{self.request.user.id}_mailings*')
-        cache.delete(f'mailing_status_{self.object.id}')
         return response
 
 
-class MailingDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class MailingDeleteView(LoginRequiredMixin, ObjectCacheMixin, UserPassesTestMixin, DeleteView):
     model = Mailing
     template_name = 'mailings/mailing_confirm_delete.html'
     success_url = reverse_lazy('mailings:mailing_list')
@@ -385,13 +366,7 @@ class MailingDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return self.request.user == mailing.owner
 
     def delete(self, request, *args, **kwargs):
-        mailing_id = self.get_object().id
-
         response = super().delete(request, *args, **kwargs)
-        cache.delete_pattern('*mailing_list*')
-        cache.delete_pattern(f'*user_{self.request.user.id}_mailings*')
-        cache.delete(f'mailing_status_{mailing_id}')
-
         messages.success(request, 'Рассылка успешно удалена!')
 
         return response
@@ -400,52 +375,23 @@ class MailingDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 @login_required
 def send_mailing(request, pk):
     """Ручной запуск рассылки"""
-    mailing = get_object_or_404(Mailing, pk=pk)
+    mailing = get_object_or_404(Mailing.objects.select_related('message', 'owner'), pk=pk)
 
     # Проверка прав
-    if request.user != mailing.owner and not request.user.has_perm('mailings.can_view_all_mailings'):
+    if request.user != mailing.owner and not request_has_perm(request, 'mailings.can_view_all_mailings'):
         messages.error(request, 'У вас нет прав для запуска этой рассылки')
         return redirect('mailings:mailing_detail', pk=pk)
 
     # Проверка статуса
-    dynamic_status = mailing.get_dynamic_status()
-    if dynamic_status != 'started':
+    if mailing.dynamic_status != 'started':
         messages.error(request,
-                       f'Рассылка не может быть запущена в данный момент. Текущий статус: {mailing.get_status_display()}')
+                       'Рассылка не может быть запущена в данный момент. '
+                       f'Текущий статус: {mailing.get_dynamic_status_display()}')
         return redirect('mailings:mailing_detail', pk=pk)
 
-    # Отправка рассылки
-    success_count = 0
-    failed_count = 0
-
-    for recipient in mailing.recipients.all():
-        try:
-            send_mail(
-                subject=mailing.message.subject,
-                message=mailing.message.body,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[recipient.email],
-                fail_silently=False,
-            )
-            status = 'success'
-            response = 'Письмо успешно отправлено'
-            success_count += 1
-        except Exception as e:
-            status = 'failed'
-            response = str(e)
-            failed_count += 1
-
-        MailingAttempt.objects.create(
-            status=status,
-            server_response=response,
-            mailing=mailing,
-            recipient=recipient
-        )
-
-    messages.success(request, f'Рассылка завершена. Успешно: {success_count}, Ошибок: {failed_count}')
-
-    # Очищаем кеш попыток
-    cache.delete(f'mailing_attempts_{mailing.id}')
+    # Отправка рассылки выполняется воркером Celery
+    send_mailing_task.delay(mailing.id)
+    messages.success(request, 'Рассылка поставлена в очередь на отправку')
 
     return redirect('mailings:mailing_detail', pk=pk)
 
@@ -455,15 +401,11 @@ def toggle_mailing_active(request, pk):
     """Включение/отключение рассылки"""
     mailing = get_object_or_404(Mailing, pk=pk)
 
-    if request.user == mailing.owner or request.user.has_perm('mailings.can_disable_mailing'):
+    if request.user == mailing.owner or request_has_perm(request, 'mailings.can_disable_mailing'):
         mailing.is_active = not mailing.is_active
-        mailing.save()
+        mailing.save(update_fields=['is_active', 'updated_at'], skip_validation=True)
         status = 'активирована' if mailing.is_active else 'отключена'
         messages.success(request, f'Рассылка {status}')
-
-        # Очищаем кеш
-        cache.delete(f'mailing_status_{mailing.id}')
-        cache.delete_pattern('mailing_list_*')
     else:
         messages.error(request, 'У вас нет прав для изменения статуса рассылки')
 
@@ -477,10 +419,14 @@ class MailingAttemptListView(LoginRequiredMixin, ListView):
     paginate_by = 20
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        # Получатель выводится в каждой строке: подтягиваем его тем же запросом
+        # Полный ответ сервера не загружаем: в списке выводится только его начало
+        queryset = super().get_queryset().select_related('recipient').defer('server_response').annotate(
+            server_response_preview=Left('server_response', 101),
+        )
 
         # Менеджеры видят все попытки
-        if self.request.user.has_perm('mailings.can_view_all_mailings'):
+        if request_has_perm(self.request, 'mailings.can_view_all_mailings'):
             return queryset
 
         # Обычные пользователи видят только попытки своих рассылок
@@ -490,48 +436,19 @@ class MailingAttemptListView(LoginRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
 
         # Добавляем статистику по попыткам
-        if self.request.user.has_perm('mailings.can_view_all_mailings'):
+        if request_has_perm(self.request, 'mailings.can_view_all_mailings'):
             queryset = MailingAttempt.objects.all()
         else:
             queryset = MailingAttempt.objects.filter(mailing__owner=self.request.user)
 
-        context['total_attempts'] = queryset.count()
-        context['successful_attempts'] = queryset.filter(status='success').count()
-        context['failed_attempts'] = queryset.filter(status='failed').count()
+        stats = queryset.aggregate(
+            total=Count('id'),
+            successful=Count('id', filter=Q(status='success')),
+            failed=Count('id', filter=Q(status='failed')),
+        )
+        context['total_attempts'] = stats['total']
+        context['successful_attempts'] = stats['successful']
+        context['failed_attempts'] = stats['failed']
 
         return context
 
-
-# Кастомная команда для отправки рассылок (будет вызываться из cron)
-def send_scheduled_mailings():
-    """Функция для отправки запланированных рассылок"""
-    now = timezone.now()
-    mailings = Mailing.objects.filter(
-        start_time__lte=now,
-        end_time__gte=now,
-        is_active=True
-    )
-
-    for mailing in mailings:
-        for recipient in mailing.recipients.all():
-            try:
-                send_mail(
-                    subject=mailing.message.subject,
-                    message=mailing.message.body,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[recipient.email],
-                    fail_silently=False,
-                )
-                MailingAttempt.objects.create(
-                    status='success',
-                    server_response='Письмо успешно отправлено',
-                    mailing=mailing,
-                    recipient=recipient
-                )
-            except Exception as e:
-                MailingAttempt.objects.create(
-                    status='failed',
-                    server_response=str(e),
-                    mailing=mailing,
-                    recipient=recipient
-                )
\ No newline at end of file
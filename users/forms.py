@@ -3,44 +3,41 @@ from django.contrib.auth.forms import UserCreationForm, UserChangeForm
 from .models import User
 
 
-class UserRegistrationForm(UserCreationForm):
-    email = forms.EmailField(required=True, label='Email',
-                            widget=forms.EmailInput(attrs={'class': 'form-control'}))
-    password1 = forms.CharField(label='Пароль',
-                               widget=forms.PasswordInput(attrs={'class': 'form-control'}))
-    password2 = forms.CharField(label='Подтверждение пароля',
-                               widget=forms.PasswordInput(attrs={'class': 'form-control'}))
-    first_name = forms.CharField(label='Имя', required=False,
-                                widget=forms.TextInput(attrs={'class': 'form-control'}))
-    last_name = forms.CharField(label='Фамилия', required=False,
-                               widget=forms.TextInput(attrs={'class': 'form-control'}))
-    phone = forms.CharField(label='Телефон', required=False,
-                           widget=forms.TextInput(attrs={'class': 'form-control'}))
-    country = forms.CharField(label='Страна', required=False,
-                             widget=forms.TextInput(attrs={'class': 'form-control'}))
+class FormControlMixin:
+    """Добавляет всем полям формы класс Bootstrap form-control"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field in self.fields.values():
+            field.widget.attrs.setdefault('class', 'form-control')
+
+
+class UserRegistrationForm(FormControlMixin, UserCreationForm):
+    email = forms.EmailField(required=True, label='Email')
+    password1 = forms.CharField(label='Пароль', widget=forms.PasswordInput)
+    password2 = forms.CharField(label='Подтверждение пароля', widget=forms.PasswordInput)
+    first_name = forms.CharField(label='Имя', required=False)
+    last_name = forms.CharField(label='Фамилия', required=False)
+    phone = forms.CharField(label='Телефон', required=False)
+    country = forms.CharField(label='Страна', required=False)
 
     class Meta:
         model = User
         fields = ('email', 'password1', 'password2', 'first_name', 'last_name', 'phone', 'country')
 
     def clean_email(self):
-        email = self.cleaned_data.get('email')
-        if User.objects.filter(email=email).exists():
-            raise forms.ValidationError('Пользователь с таким email уже существует')
-        return email
+        # Email хранится в нижнем регистре. Дубликаты в другом регистре отсекает проверка ограничения
+        # user_email_upper_uniq, гонку одновременных регистраций — само ограничение БД (IntegrityError в register)
+        return self.cleaned_data.get('email').lower()
 
 
-class UserProfileForm(UserChangeForm):
+class UserProfileForm(FormControlMixin, UserChangeForm):
     password = None
 
     class Meta:
         model = User
         fields = ('email', 'first_name', 'last_name', 'phone', 'country', 'avatar')
         widgets = {
-            'email': forms.EmailInput(attrs={'class': 'form-control', 'readonly': 'readonly'}),
-            'first_name': forms.TextInput(attrs={'class': 'form-control'}),
-            'last_name': forms.TextInput(attrs={'class': 'form-control'}),
-            'phone': forms.TextInput(attrs={'class': 'form-control'}),
-            'country': forms.TextInput(attrs={'class': 'form-control'}),
-            'avatar': forms.FileInput(attrs={'class': 'form-control'}),
-        }
\ No newline at end of file
+            'email': forms.EmailInput(attrs={'readonly': 'readonly'}),
+            'avatar': forms.FileInput,
+        }
@@ -1,6 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Q
 from users.models import User
 from mailings.models import Mailing, Message, Recipient
 
@@ -8,6 +10,7 @@ from mailings.models import Mailing, Message, Recipient
 class Command(BaseCommand):
     help = 'Создание групп пользователей и назначение прав'
 
+    @transaction.atomic
     def handle(self, *args, **options):
         # Создание группы менеджеров
         managers_group, created = Group.objects.get_or_create(name='Менеджеры')
@@ -17,43 +20,26 @@ class Command(BaseCommand):
         else:
             self.stdout.write(self.style.WARNING('Группа "Менеджеры" уже существует'))
 
-        # Очищаем старые права
-        managers_group.permissions.clear()
+        # Права менеджеров по моделям
+        manager_permissions = {
+            User: ['can_block_user', 'can_view_all_users'],
+            Mailing: ['can_view_all_mailings', 'can_disable_mailing'],
+            Message: ['can_view_all_messages'],
+            Recipient: ['can_view_all_recipients'],
+        }
 
-        # Права для работы с пользователями
-        user_content_type = ContentType.objects.get_for_model(User)
-        user_permissions = Permission.objects.filter(
-            content_type=user_content_type,
-            codename__in=['can_block_user', 'can_view_all_users']
-        )
-        managers_group.permissions.add(*user_permissions)
-
-        # Права для работы с рассылками
-        mailing_content_type = ContentType.objects.get_for_model(Mailing)
-        mailing_permissions = Permission.objects.filter(
-            content_type=mailing_content_type,
-            codename__in=['can_view_all_mailings', 'can_disable_mailing']
-        )
-        managers_group.permissions.add(*mailing_permissions)
+        # Типы содержимого и права выбираются одним запросом для всех моделей
+        content_types = ContentType.objects.get_for_models(*manager_permissions)
+        permissions_filter = Q()
+        for model, codenames in manager_permissions.items():
+            permissions_filter |= Q(content_type=content_types[model], codename__in=codenames)
+        all_perms = list(Permission.objects.filter(permissions_filter))
 
-        # Права для работы с сообщениями
-        message_content_type = ContentType.objects.get_for_model(Message)
-        message_permissions = Permission.objects.filter(
-            content_type=message_content_type,
-            codename='can_view_all_messages'
-        )
-        managers_group.permissions.add(*message_permissions)
-
-        # Права для работы с получателями
-        recipient_content_type = ContentType.objects.get_for_model(Recipient)
-        recipient_permissions = Permission.objects.filter(
-            content_type=recipient_content_type,
-            codename='can_view_all_recipients'
-        )
-        managers_group.permissions.add(*recipient_permissions)
+        # set() удаляет и добавляет только изменившиеся права, без очистки всей группы
+        managers_group.permissions.set(all_perms)
 
         self.stdout.write(
-            self.style.SUCCESS(f'Назначено {managers_group.permissions.count()} прав для группы "Менеджеры"')
+            self.style.SUCCESS(f'Назначено {len(all_perms)} прав для группы "Менеджеры"')
         )
 
         # Создание группы обычных пользователей (опционально)
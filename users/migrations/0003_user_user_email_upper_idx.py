@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-14 11:00
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_alter_user_options_user_email_verification_sent_at_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(django.db.models.functions.text.Upper("email"), name="user_email_upper_idx"),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-14 11:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_user_user_email_upper_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("email_verification_token__isnull", False)),
+                fields=["email_verification_token"],
+                name="user_evt_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-14 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0005_alter_user_managers"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="email_verification_token",
+            field=models.CharField(blank=True, max_length=32, null=True, verbose_name="Токен подтверждения"),
+        ),
+    ]
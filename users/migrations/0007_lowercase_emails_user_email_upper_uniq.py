@@ -0,0 +1,48 @@
+# Generated by Django 6.0.2 on 2026-10-14 12:00
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+def lowercase_emails(apps, schema_editor):
+    """Приведение сохранённых email к нижнему регистру"""
+    User = apps.get_model("users", "User")
+
+    duplicates = list(
+        User.objects.annotate(email_lower=Lower("email"))
+        .values("email_lower")
+        .annotate(count=models.Count("id"))
+        .filter(count__gt=1)
+        .values_list("email_lower", flat=True)
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Найдены аккаунты, email которых отличаются только регистром: "
+            f"{', '.join(sorted(duplicates))}. Объедините или удалите их и повторите миграцию."
+        )
+
+    User.objects.exclude(email=Lower("email")).update(email=Lower("email"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0006_alter_user_email_verification_token"),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="user",
+            name="user_email_upper_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="user",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.text.Upper("email"),
+                name="user_email_upper_uniq",
+                violation_error_message="Пользователь с таким email уже существует",
+            ),
+        ),
+    ]
@@ -1,7 +1,45 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Upper
 from django.utils import timezone
-import uuid
+import secrets
+
+
+class UserManager(BaseUserManager):
+    """Менеджер пользователей с email вместо username"""
+    use_in_migrations = True
+
+    # Поля, нужные для входа: проверка пароля, статусов и сообщение о входе
+    LOGIN_FIELDS = ('id', 'email', 'password', 'is_active', 'is_blocked', 'is_verified')
+
+    def _create_user(self, email, password, **extra_fields):
+        if not email:
+            raise ValueError('Email обязателен')
+        user = self.model(email=self.normalize_email(email), **extra_fields)
+        user.set_password(password)
+        user.save(using=self._db)
+        return user
+
+    def create_user(self, email, password=None, **extra_fields):
+        extra_fields.setdefault('is_staff', False)
+        extra_fields.setdefault('is_superuser', False)
+        return self._create_user(email, password, **extra_fields)
+
+    def create_superuser(self, email, password=None, **extra_fields):
+        extra_fields.setdefault('is_staff', True)
+        extra_fields.setdefault('is_superuser', True)
+        extra_fields.setdefault('is_verified', True)
+        if extra_fields.get('is_staff') is not True:
+            raise ValueError('У суперпользователя должно быть is_staff=True')
+        if extra_fields.get('is_superuser') is not True:
+            raise ValueError('У суперпользователя должно быть is_superuser=True')
+        return self._create_user(email, password, **extra_fields)
+
+    def get_by_natural_key(self, email):
+        """Загрузка пользователя при входе (ModelBackend) только с нужными полями"""
+        # Email хранится в нижнем регистре, поэтому вход не зависит от регистра ввода
+        return self.only(*self.LOGIN_FIELDS).get(**{f'{self.model.USERNAME_FIELD}__iexact': email})
 
 
 class User(AbstractUser):
@@ -12,12 +50,14 @@ class User(AbstractUser):
     country = models.CharField(max_length=100, null=True, blank=True, verbose_name='Страна')
     is_blocked = models.BooleanField(default=False, verbose_name='Заблокирован')
     is_verified = models.BooleanField(default=False, verbose_name='Email подтвержден')
-    email_verification_token = models.CharField(max_length=100, null=True, blank=True, verbose_name='Токен подтверждения')
+    email_verification_token = models.CharField(max_length=32, null=True, blank=True, verbose_name='Токен подтверждения')
     email_verification_sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Дата отправки подтверждения')
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
+    objects = UserManager()
+
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
@@ -25,13 +65,31 @@ class User(AbstractUser):
             ('can_block_user', 'Может блокировать пользователя'),
             ('can_view_all_users', 'Может просматривать всех пользователей'),
         ]
+        indexes = [
+            # Токен есть только у неподтверждённых пользователей: частичный индекс намного меньше полного
+            models.Index(fields=['email_verification_token'], name='user_evt_idx',
+                         condition=Q(email_verification_token__isnull=False)),
+        ]
+        constraints = [
+            # Один аккаунт на адрес в любом регистре; индекс этого ограничения обслуживает
+            # email__iexact (в PostgreSQL Django сравнивает UPPER(email))
+            models.UniqueConstraint(Upper('email'), name='user_email_upper_uniq',
+                                    violation_error_message='Пользователь с таким email уже существует'),
+        ]
 
     def __str__(self):
         return self.email
 
+    def save(self, *args, **kwargs):
+        # Email хранится в нижнем регистре
+        if self.email:
+            self.email = self.email.lower()
+        super().save(*args, **kwargs)
+
     def generate_verification_token(self):
         """Генерация токена для подтверждения email"""
-        self.email_verification_token = uuid.uuid4().hex
+        # 128 бит случайности в 22 URL-безопасных символах (uuid4().hex давал 32)
+        self.email_verification_token = secrets.token_urlsafe(16)
         self.email_verification_sent_at = timezone.now()
-        self.save()
+        self.save(update_fields=['email_verification_token', 'email_verification_sent_at'])
         return self.email_verification_token
\ No newline at end of file
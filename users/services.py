@@ -1,16 +1,28 @@
 from django.core.mail import send_mail
 from django.conf import settings
 from django.urls import reverse
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.template.loader import get_template
+from functools import lru_cache
 
 
-def send_verification_email(user, request):
-    """Отправка письма для подтверждения email"""
+@lru_cache(maxsize=None)
+def _get_email_template(template_name):
+    """Скомпилированный шаблон письма (загружается один раз на процесс)"""
+    return get_template(template_name)
+
+
+def send_verification_email(user, request=None, connection=None):
+    """Отправка письма для подтверждения email.
+
+    Без request (в фоновой задаче) абсолютная ссылка строится от settings.SITE_URL.
+    При отправке нескольких писем подряд передайте общее SMTP-соединение (get_connection()).
+    """
     token = user.generate_verification_token()
-    verification_url = request.build_absolute_uri(
-        reverse('users:verify_email', args=[token])
-    )
+    verification_path = reverse('users:verify_email', args=[token])
+    if request is not None:
+        verification_url = request.build_absolute_uri(verification_path)
+    else:
+        verification_url = f'{settings.SITE_URL.rstrip("/")}{verification_path}'
 
     context = {
         'user': user,
@@ -18,8 +30,8 @@ def send_verification_email(user, request):
         'site_name': 'Сервис рассылок',
     }
 
-    html_message = render_to_string('users/email/verification_email.html', context)
-    plain_message = strip_tags(html_message)
+    html_message = _get_email_template('users/email/verification_email.html').render(context)
+    plain_message = _get_email_template('users/email/verification_email.txt').render(context)
 
     send_mail(
         subject='Подтверждение email на сервисе рассылок',
@@ -28,6 +40,7 @@ def send_verification_email(user, request):
         recipient_list=[user.email],
         html_message=html_message,
         fail_silently=False,
+        connection=connection,
     )
 
 
@@ -0,0 +1,18 @@
+from celery import shared_task
+from .models import User
+from .services import send_verification_email
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def send_verification_email_task(user_id):
+    """Фоновая отправка письма для подтверждения email"""
+    try:
+        user = User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        logger.warning('Пользователь #%s не найден', user_id)
+        return
+
+    send_verification_email(user)
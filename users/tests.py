@@ -1,3 +1,125 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import User
+from .views import RESEND_IP_LIMIT
+
+
+class EmailCaseTest(TestCase):
+    """Email без учёта регистра"""
+
+    def test_email_is_stored_lowercase(self):
+        user = User.objects.create_user(email='New@Example.com', password='pass')
+        user.refresh_from_db()
+        self.assertEqual(user.email, 'new@example.com')
+
+    def test_login_with_original_spelling(self):
+        User.objects.create_user(email='New@Example.com', password='pass', is_verified=True)
+
+        self.assertIsNotNone(authenticate(email='New@Example.com', password='pass'))
+        self.assertIsNotNone(authenticate(email='new@example.com', password='pass'))
+
+    def test_login_view_with_original_spelling(self):
+        User.objects.create_user(email='New@Example.com', password='pass', is_verified=True)
+
+        response = self.client.post(reverse('users:login'), {'email': 'New@Example.com', 'password': 'pass'})
+
+        self.assertRedirects(response, reverse('mailings:home'), fetch_redirect_response=False)
+
+
+class RegistrationTest(TestCase):
+    """Регистрация с уже занятым email"""
+
+    password = 'Str0ng-Passw0rd!'
+
+    def register(self, email):
+        return self.client.post(reverse('users:register'), {
+            'email': email,
+            'password1': self.password,
+            'password2': self.password,
+        })
+
+    @mock.patch('users.views.send_verification_email_task')
+    def test_registration(self, task):
+        response = self.register('New@Example.com')
+
+        self.assertRedirects(response, reverse('users:login'), fetch_redirect_response=False)
+        user = User.objects.get()
+        self.assertEqual(user.email, 'new@example.com')
+        task.delay.assert_called_once_with(user.id)
+
+    @mock.patch('users.views.send_verification_email_task')
+    def test_duplicate_email_in_other_case(self, task):
+        # Запись, созданная до приведения email к нижнему регистру
+        user = User.objects.create_user(email='legacy@example.com', password='pass')
+        User.objects.filter(pk=user.pk).update(email='Legacy@Example.com')
+
+        response = self.register('legacy@example.com')
+
+        self.assertEqual(response.status_code, 200)
+        # Ошибку даёт проверка ограничения user_email_upper_uniq, отдельного запроса в clean_email нет
+        self.assertFormError(response.context['form'], None, 'Пользователь с таким email уже существует')
+        self.assertContains(response, 'Пользователь с таким email уже существует')
+        self.assertEqual(User.objects.count(), 1)
+        task.delay.assert_not_called()
+
+    def test_database_rejects_email_in_other_case(self):
+        User.objects.create_user(email='legacy@example.com', password='pass')
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.bulk_create([User(email='LEGACY@example.com')])
+
+
+@mock.patch('users.views.send_verification_email_task')
+class ResendVerificationTest(TestCase):
+    """Ограничение повторной отправки письма подтверждения"""
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('users:resend_verification')
+
+    def test_second_request_for_same_email_is_throttled(self, task):
+        user = User.objects.create_user(email='new@example.com', password='pass')
+
+        first = self.client.post(self.url, {'email': 'new@example.com'})
+        second = self.client.post(self.url, {'email': 'New@Example.com'})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 429)
+        task.delay.assert_called_once_with(user.id)
+
+    def test_unknown_and_invalid_emails_do_not_use_address_limit(self, task):
+        self.client.post(self.url, {'email': 'new@example.com'})
+        response = self.client.post(self.url, {'email': ''})
+        self.assertContains(response, 'Введите корректный email.')
+
+        user = User.objects.create_user(email='new@example.com', password='pass')
+        response = self.client.post(self.url, {'email': 'new@example.com'})
+
+        self.assertEqual(response.status_code, 200)
+        task.delay.assert_called_once_with(user.id)
+
+    @override_settings(CLIENT_IP_HEADER='HTTP_X_REAL_IP')
+    def test_ip_limit_uses_proxy_header(self, task):
+        for i in range(RESEND_IP_LIMIT):
+            self.client.post(self.url, {'email': f'user{i}@example.com'}, HTTP_X_REAL_IP='10.0.0.1')
+
+        other = self.client.post(self.url, {'email': 'another@example.com'}, HTTP_X_REAL_IP='10.0.0.2')
+        same = self.client.post(self.url, {'email': 'another@example.com'}, HTTP_X_REAL_IP='10.0.0.1')
+
+        self.assertEqual(other.status_code, 200)
+        self.assertEqual(same.status_code, 429)
+
+    def test_requests_from_one_ip_are_throttled(self, task):
+        for i in range(RESEND_IP_LIMIT):
+            response = self.client.post(self.url, {'email': f'user{i}@example.com'})
+            self.assertEqual(response.status_code, 200)
+
+        response = self.client.post(self.url, {'email': 'another@example.com'})
+
+        self.assertEqual(response.status_code, 429)
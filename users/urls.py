@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, reverse_lazy
 from django.contrib.auth import views as auth_views
 from . import views
 
@@ -20,7 +20,7 @@ urlpatterns = [
          auth_views.PasswordResetView.as_view(
              template_name='users/password_reset.html',
              email_template_name='users/password_reset_email.html',
-             success_url='/users/password-reset/done/'
+             success_url=reverse_lazy('users:password_reset_done')
          ),
          name='password_reset'),
     path('password-reset/done/',
@@ -31,7 +31,7 @@ urlpatterns = [
     path('password-reset/<uidb64>/<token>/',
          auth_views.PasswordResetConfirmView.as_view(
              template_name='users/password_reset_confirm.html',
-             success_url='/users/password-reset/complete/'
+             success_url=reverse_lazy('users:password_reset_complete')
          ),
          name='password_reset_confirm'),
     path('password-reset/complete/',
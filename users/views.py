@@ -4,11 +4,18 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth.mixins import PermissionRequiredMixin, LoginRequiredMixin
 from django.views.generic import ListView
+from django.db import IntegrityError, transaction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
 from django.utils import timezone
 from datetime import timedelta
 from .forms import UserRegistrationForm, UserProfileForm
 from .models import User
-from .services import send_verification_email
+from .tasks import send_verification_email_task
 
 
 def register(request):
@@ -19,10 +26,16 @@ def register(request):
             user = form.save(commit=False)
             user.is_active = True
             user.is_verified = False
-            user.save()
+            # Уникальность email гарантирует БД: одновременные регистрации не пройдут обе
+            try:
+                with transaction.atomic():
+                    user.save()
+            except IntegrityError:
+                form.add_error('email', 'Пользователь с таким email уже существует')
+                return render(request, 'users/register.html', {'form': form})
 
-            # Отправка письма для подтверждения
-            send_verification_email(user, request)
+            # Письмо для подтверждения отправляет воркер Celery
+            send_verification_email_task.delay(user.id)
 
             messages.success(request, 'Регистрация прошла успешно! На ваш email отправлено письмо с подтверждением.')
             return redirect('users:login')
@@ -34,35 +47,88 @@ def register(request):
 
 def verify_email(request, token):
     """Подтверждение email по токену"""
-    try:
-        user = User.objects.get(email_verification_token=token)
-
-        # Проверка, не истек ли токен (24 часа)
-        if user.email_verification_sent_at and \
-                user.email_verification_sent_at + timedelta(hours=24) > timezone.now():
-            user.is_verified = True
-            user.email_verification_token = None
-            user.email_verification_sent_at = None
-            user.save()
-            messages.success(request, 'Email успешно подтвержден! Теперь вы можете войти в систему.')
-        else:
-            messages.error(request, 'Ссылка для подтверждения устарела. Запросите новую.')
-    except User.DoesNotExist:
+    # Проверка срока действия токена (24 часа) и подтверждение одним UPDATE
+    verified = User.objects.filter(
+        email_verification_token=token,
+        email_verification_sent_at__gt=timezone.now() - timedelta(hours=24),
+    ).update(is_verified=True, email_verification_token=None, email_verification_sent_at=None)
+
+    if verified:
+        messages.success(request, 'Email успешно подтвержден! Теперь вы можете войти в систему.')
+    elif User.objects.filter(email_verification_token=token).exists():
+        messages.error(request, 'Ссылка для подтверждения устарела. Запросите новую.')
+    else:
         messages.error(request, 'Недействительная ссылка для подтверждения.')
 
     return redirect('users:login')
 
 
+# Ограничения повторной отправки письма подтверждения
+RESEND_EMAIL_INTERVAL = 60  # Не чаще одного письма в минуту на адрес
+RESEND_IP_LIMIT = 5  # Запросов в минуту с одного IP
+
+
+def _client_ip(request):
+    """IP клиента для ограничений по IP.
+
+    За обратным прокси REMOTE_ADDR содержит адрес самого прокси, поэтому IP берётся
+    из заголовка settings.CLIENT_IP_HEADER. Если заголовок не настроен, считается,
+    что прокси нет.
+    """
+    header = settings.CLIENT_IP_HEADER
+    if header:
+        # В X-Forwarded-For может прийти цепочка адресов: последний добавил наш прокси
+        ip = request.META.get(header, '').split(',')[-1].strip()
+        if ip:
+            return ip
+    return request.META.get('REMOTE_ADDR')
+
+
+def _resend_ip_limited(ip):
+    """Лимит запросов повторной отправки с одного IP (счётчик в кеше, без обращения к БД)"""
+    ip_key = f'resend_verification:ip:{ip}'
+    cache.add(ip_key, 0, 60)
+    try:
+        return cache.incr(ip_key) > RESEND_IP_LIMIT
+    except ValueError:
+        # Счётчик истёк между add() и incr()
+        cache.set(ip_key, 1, 60)
+        return False
+
+
+def _resend_email_limited(email):
+    """Лимит писем на один адрес: add() атомарен, право на отправку получает только первый запрос за интервал"""
+    return not cache.add(f'resend_verification:email:{email}', 1, RESEND_EMAIL_INTERVAL)
+
+
+def _too_many_requests(request):
+    """Ответ 429 при превышении лимитов повторной отправки"""
+    messages.error(request, 'Слишком много запросов. Повторите попытку через минуту.')
+    return render(request, 'users/resend_verification.html', status=429)
+
+
 def resend_verification(request):
     """Повторная отправка письма для подтверждения"""
     if request.method == 'POST':
-        email = request.POST.get('email')
+        if _resend_ip_limited(_client_ip(request)):
+            return _too_many_requests(request)
+
+        email = (request.POST.get('email') or '').strip().lower()
         try:
-            user = User.objects.get(email=email, is_verified=False)
-            send_verification_email(user, request)
-            messages.success(request, 'Письмо с подтверждением отправлено повторно.')
-        except User.DoesNotExist:
+            validate_email(email)
+        except ValidationError:
+            messages.error(request, 'Введите корректный email.')
+            return render(request, 'users/resend_verification.html')
+
+        user_id = User.objects.filter(email__iexact=email, is_verified=False).values_list('id', flat=True).first()
+        if user_id is None:
             messages.error(request, 'Пользователь с таким email не найден или уже подтвержден.')
+        elif _resend_email_limited(email):
+            # Интервал на адрес расходуется только реальными письмами
+            return _too_many_requests(request)
+        else:
+            send_verification_email_task.delay(user_id)
+            messages.success(request, 'Письмо с подтверждением отправлено повторно.')
 
     return render(request, 'users/resend_verification.html')
 
@@ -112,6 +178,16 @@ def profile(request):
     return render(request, 'users/profile.html', {'form': form})
 
 
+class CachedCountPaginator(Paginator):
+    """Пагинатор с кешированием общего количества записей (без COUNT(*) на каждой странице)"""
+    count_cache_key = 'users:count'
+    count_cache_timeout = 60
+
+    @cached_property
+    def count(self):
+        return cache.get_or_set(self.count_cache_key, self.object_list.count, self.count_cache_timeout)
+
+
 class UserListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     """Список пользователей (только для менеджеров)"""
     model = User
@@ -119,12 +195,21 @@ class UserListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     context_object_name = 'users'
     permission_required = 'users.can_view_all_users'
     paginate_by = 20
+    paginator_class = CachedCountPaginator
+
+    def get_queryset(self):
+        # Шаблон не обращается к группам и правам, поэтому prefetch не нужен: достаточно выводимых полей.
+        # Явная сортировка делает страницы пагинации стабильными
+        return User.objects.only(
+            'id', 'email', 'first_name', 'last_name', 'phone', 'country', 'is_blocked'
+        ).order_by('id')
 
 
 @login_required
 def block_user(request, user_id):
     """Блокировка/разблокировка пользователя (только для менеджеров)"""
-    if not request.user.has_perm('users.can_block_user'):
+    # Суперпользователю не нужно загружать набор прав
+    if not (request.user.is_superuser or request.user.has_perm('users.can_block_user')):
         messages.error(request, 'У вас нет прав для блокировки пользователей.')
         return redirect('users:user_list')
 
@@ -134,7 +219,7 @@ def block_user(request, user_id):
         messages.error(request, 'Вы не можете заблокировать самого себя.')
     else:
         user.is_blocked = not user.is_blocked
-        user.save()
+        user.save(update_fields=['is_blocked'])
         status = 'заблокирован' if user.is_blocked else 'разблокирован'
         messages.success(request, f'Пользователь {user.email} {status}.')
 